@@ -3,60 +3,107 @@ Terminal-based WebSocket Chat Client - Enhanced Version
 Features: Role-based access, auto-reconnection, better error handling, typing indicators
 """
 import socketio
-import threading
+import asyncio
 import sys
-from datetime import datetime
 import getpass
 import os
-from dotenv import load_dotenv
 import time
+from dotenv import load_dotenv
+import aioconsole
 
 # Load environment variables
 load_dotenv()
 
-# Create a Socket.IO client with enhanced configuration
-sio = socketio.Client(
+# Use orjson for frame encode/decode when available - it is several times
+# faster than stdlib json on the small payloads chat traffic is made of
+try:
+    import orjson
+
+    class _OrjsonShim:
+        """Expose orjson through the json-module interface Socket.IO expects"""
+        dumps = staticmethod(lambda obj, **kwargs: orjson.dumps(obj).decode())
+        loads = staticmethod(orjson.loads)
+
+    json_module = _OrjsonShim
+except ImportError:
+    import json as json_module
+
+# Create an async Socket.IO client with enhanced configuration
+sio = socketio.AsyncClient(
     reconnection=True,
     reconnection_attempts=5,
     reconnection_delay=1,
     reconnection_delay_max=5,
     logger=False,
-    engineio_logger=False
+    engineio_logger=False,
+    json=json_module
 )
 
 # Client state
 username = ""
-connected = False
+PROMPT = ""  # cached "<username>: " prompt, set once in main()
 current_room = ""
 is_admin = False
-typing_timer = None
+typing_last = 0.0  # monotonic timestamp of the last send
 is_typing = False
 TYPING_TIMER_LENGTH = 2  # seconds
 
+# Interned keys for the hot inbound payload lookups - interned strings
+# hit CPython's identity fast path in dict probes
+_K_TIMESTAMP, _K_USERNAME, _K_MESSAGE, _K_ROOM_ID, _K_CREATED_AT = map(
+    sys.intern, ('timestamp', 'username', 'message', 'room_id', 'created_at'))
+
+# Outgoing emits are queued and drained by a single writer task,
+# so keystroke bursts are written back-to-back instead of one
+# event-loop round trip per emit
+OUTBOX_MAXSIZE = 256
+OUTBOX_BATCH = 16
+outbox = asyncio.Queue(maxsize=OUTBOX_MAXSIZE)
+
 # ============================================
 # UTILITY FUNCTIONS
 # ============================================
 
+# ANSI colors, built once instead of per print_message call
+COLORS = {
+    'red': '\033[91m',
+    'green': '\033[92m',
+    'yellow': '\033[93m',
+    'blue': '\033[94m',
+    'magenta': '\033[95m',
+    'cyan': '\033[96m',
+}
+RESET = '\033[0m'
+
+
 def clear_line():
     """Clear the current line in terminal"""
-    sys.stdout.write('\r' + ' ' * 100 + '\r')
+    # ANSI erase-line: 5 bytes and one flush instead of writing 100
+    # spaces with two carriage returns
+    sys.stdout.write('\r\x1b[2K')
+    sys.stdout.flush()
+
+
+def show_prompt():
+    """Redraw the cached input prompt without re-formatting it"""
+    sys.stdout.write(PROMPT)
+    sys.stdout.flush()
+
+
+def print_event(line, color):
+    """Clear the line, show one colored line and redraw the prompt
+
+    Common case for event handlers - everything goes out in a single
+    write + flush instead of three.
+    """
+    sys.stdout.write(f"\r\x1b[2K{COLORS[color]}{line}{RESET}\n{PROMPT}")
     sys.stdout.flush()
 
 
 def print_message(message, color=None):
     """Print colored message to terminal"""
-    colors = {
-        'red': '\033[91m',
-        'green': '\033[92m',
-        'yellow': '\033[93m',
-        'blue': '\033[94m',
-        'magenta': '\033[95m',
-        'cyan': '\033[96m',
-        'reset': '\033[0m'
-    }
-    
-    if color and color in colors:
-        print(f"{colors[color]}{message}{colors['reset']}")
+    if color and color in COLORS:
+        print(f"{COLORS[color]}{message}{RESET}")
     else:
         print(message)
 
@@ -78,8 +125,6 @@ def validate_input(text, max_length=1000):
 @sio.event
 def connect():
     """Handle connection to server"""
-    global connected
-    connected = True
     print_message("\n✓ Connected to server successfully!", 'green')
 
 
@@ -92,8 +137,6 @@ def connect_error(data):
 @sio.event
 def disconnect():
     """Handle disconnection from server"""
-    global connected
-    connected = False
     print_message("\n✗ Disconnected from server", 'red')
 
 
@@ -105,12 +148,11 @@ def connection_response(data):
 
 
 @sio.event
-def auth_failed(data):
+async def auth_failed(data):
     """Handle authentication failure"""
     print_message(f"\n✗ {data.get('message', 'Authentication failed')}", 'red')
     print_message("Disconnecting...", 'yellow')
-    sio.disconnect()
-    sys.exit(1)
+    await sio.disconnect()
 
 
 @sio.event
@@ -120,14 +162,19 @@ def admin_connected(data):
     is_admin = True
     current_room = "admin-lobby"
 
-    print_message(f"\n{data.get('message', '')}", 'green')
-    print("=" * 60)
-    print_message("ADMIN COMMANDS:", 'cyan')
-    print("  /list              - Show all waiting rooms")
-    print("  /join <room_id>    - Join a specific room")
-    print("  /refresh           - Refresh room list")
-    print("  quit               - Disconnect")
-    print("=" * 60 + "\n")
+    # Build the banner once and write it in a single call
+    banner = '\n'.join([
+        f"\n{COLORS['green']}{data.get('message', '')}{RESET}",
+        "=" * 60,
+        f"{COLORS['cyan']}ADMIN COMMANDS:{RESET}",
+        "  /list              - Show all waiting rooms",
+        "  /join <room_id>    - Join a specific room",
+        "  /refresh           - Refresh room list",
+        "  quit               - Disconnect",
+        "=" * 60 + "\n\n",
+    ])
+    sys.stdout.write(banner)
+    sys.stdout.flush()
 
 
 @sio.event
@@ -146,16 +193,18 @@ def waiting_for_admin(data):
 @sio.event
 def new_room_available(data):
     """Notify admin of new waiting room"""
-    room_id = data.get('room_id', '')
-    user = data.get('username', '')
-    created = datetime.fromisoformat(data.get('created_at', '')).strftime('%H:%M:%S')
+    room_id = data.get(_K_ROOM_ID, '')
+    user = data.get(_K_USERNAME, '')
+    # ISO timestamps are 'YYYY-MM-DDTHH:MM:SS...' - slice out HH:MM:SS
+    # instead of paying for a full datetime parse + strftime
+    created = data.get(_K_CREATED_AT, '')[11:19]
 
     clear_line()
     print_message(f"\n🔔 NEW ROOM AVAILABLE", 'yellow')
     print_message(f"   Room ID: {room_id}", 'cyan')
     print_message(f"   User: {user} | Time: {created}", 'cyan')
     print_message(f"   Type '/join {room_id}' to connect\n", 'green')
-    print(f"{username}: ", end='', flush=True)
+    show_prompt()
 
 
 @sio.event
@@ -163,24 +212,26 @@ def rooms_list(data):
     """Display list of waiting rooms"""
     rooms = data.get('rooms', [])
 
-    clear_line()
-    print("\n" + "=" * 70)
-    print_message("WAITING ROOMS:", 'cyan')
-    print("=" * 70)
+    # Build the whole listing and write it in one call instead of a
+    # print (write + flush) per line
+    lines = ['', '=' * 70, f"{COLORS['cyan']}WAITING ROOMS:{RESET}", '=' * 70]
 
     if not rooms:
-        print_message("  No rooms waiting", 'yellow')
+        lines.append(f"{COLORS['yellow']}  No rooms waiting{RESET}")
     else:
         for idx, room in enumerate(rooms, 1):
             room_id = room['room_id']
             user = room['username']
-            created = datetime.fromisoformat(room['created_at']).strftime('%H:%M:%S')
-            print(f"\n  [{idx}] Room ID: {room_id}")
-            print(f"      User: {user} | Created: {created}")
-            print_message(f"      → Type '/join {room_id}' to connect", 'green')
+            created = room['created_at'][11:19]
+            lines.append(f"\n  [{idx}] Room ID: {room_id}")
+            lines.append(f"      User: {user} | Created: {created}")
+            lines.append(f"{COLORS['green']}      → Type '/join {room_id}' to connect{RESET}")
+
+    lines.append('=' * 70 + '\n\n')
 
-    print("=" * 70 + "\n")
-    print(f"{username}: ", end='', flush=True)
+    clear_line()
+    sys.stdout.write('\n'.join(lines))
+    show_prompt()
 
 
 @sio.event
@@ -204,7 +255,7 @@ def admin_joined(data):
     clear_line()
     print_message(f"\n✓ {data.get('message', '')}", 'green')
     print("-" * 60 + "\n")
-    print(f"{username}: ", end='', flush=True)
+    show_prompt()
 
 
 @sio.event
@@ -214,111 +265,169 @@ def user_left(data):
     print_message(f"\n>>> {data.get('message', 'User left')} <<<", 'red')
     if is_admin:
         print_message("Type /list to see other waiting rooms", 'yellow')
-    print(f"\n{username}: ", end='', flush=True)
+    sys.stdout.write('\n')
+    show_prompt()
 
 
 @sio.event
 def system_message(data):
     """Handle system messages"""
-    clear_line()
-    print_message(f"\n[SYSTEM] {data.get('message', '')}", 'yellow')
-    print(f"{username}: ", end='', flush=True)
+    print_event(f"\n[SYSTEM] {data.get('message', '')}", 'yellow')
 
 
 @sio.event
 def receive_message(data):
     """Handle incoming messages"""
-    timestamp = datetime.fromisoformat(data['timestamp']).strftime('%H:%M:%S')
-    sender = data['username']
-    message = data['message']
+    timestamp = data[_K_TIMESTAMP][11:19]
+    sender = data[_K_USERNAME]
+    message = data[_K_MESSAGE]
 
-    clear_line()
-    print_message(f"[{timestamp}] {sender}: {message}", 'cyan')
-    print(f"{username}: ", end='', flush=True)
+    print_event(f"[{timestamp}] {sender}: {message}", 'cyan')
 
 
 @sio.event
 def user_typing(data):
     """Handle typing indicator"""
-    typing_user = data.get('username', 'User')
-    clear_line()
-    print_message(f"{typing_user} is typing...", 'magenta')
-    print(f"{username}: ", end='', flush=True)
+    typing_user = data.get(_K_USERNAME, 'User')
+    print_event(f"{typing_user} is typing...", 'magenta')
 
 
 @sio.event
 def user_stopped_typing(data):
     """Handle stopped typing"""
     clear_line()
-    print(f"{username}: ", end='', flush=True)
+    show_prompt()
+
+
+# ============================================
+# OUTGOING MESSAGE QUEUE
+# ============================================
+
+async def queue_emit(event, data):
+    """Queue an outgoing emit for the writer task"""
+    await outbox.put((event, data))
+
+
+async def _emit_queued(event, data):
+    """Emit one queued event, surviving mid-reconnect failures
+
+    sio.emit raises (e.g. BadNamespaceError) while the client is
+    reconnecting; letting that escape would kill the writer task and
+    silently mute the client for good, so drop the event and carry on.
+    """
+    try:
+        await sio.emit(event, data)
+    except socketio.exceptions.SocketIOError as e:
+        print_message(f"Failed to send {event}: {e}", 'red')
+
+
+async def outbox_writer():
+    """Drain queued emits in batches and write them back-to-back"""
+    while True:
+        event, data = await outbox.get()
+        await _emit_queued(event, data)
+
+        # Drain whatever else piled up before yielding again
+        for _ in range(OUTBOX_BATCH - 1):
+            try:
+                event, data = outbox.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            await _emit_queued(event, data)
 
 
 # ============================================
 # TYPING INDICATOR
 # ============================================
 
-def handle_typing():
+async def handle_typing():
     """Handle typing indicator"""
-    global typing_timer, is_typing
-    
+    global typing_last, is_typing
+
+    # Just stamp the time - the watcher task handles expiry, so no
+    # timer object is created per keystroke
+    typing_last = time.monotonic()
+
     if not is_typing:
         is_typing = True
-        sio.emit('typing', {'typing': True})
-    
-    # Cancel existing timer
-    if typing_timer:
-        typing_timer.cancel()
-    
-    # Set new timer to stop typing
-    typing_timer = threading.Timer(TYPING_TIMER_LENGTH, stop_typing)
-    typing_timer.start()
-
-
-def stop_typing():
+        await queue_emit('typing', {'typing': True})
+
+
+async def typing_watcher():
+    """Single long-lived task that expires the typing indicator"""
+    while True:
+        await asyncio.sleep(0.5)
+        if is_typing and time.monotonic() - typing_last > TYPING_TIMER_LENGTH:
+            await stop_typing()
+
+
+async def stop_typing():
     """Stop typing indicator"""
     global is_typing
     if is_typing:
         is_typing = False
-        sio.emit('typing', {'typing': False})
+        await queue_emit('typing', {'typing': False})
 
 
 # ============================================
 # MESSAGE SENDING
 # ============================================
 
-def send_messages():
+async def cmd_list(rest):
+    """Request the waiting-room list"""
+    await sio.emit('list_rooms')
+
+
+async def cmd_join(rest):
+    """Join a waiting room by id"""
+    room_id = rest.strip()
+    if room_id:
+        await sio.emit('join_room_by_id', {'room_id': room_id})
+    else:
+        print_message("Usage: /join <room_id>", 'red')
+
+
+async def cmd_help(rest):
+    """Show available admin commands"""
+    print("\nAvailable Commands:")
+    print("  /list or /refresh  - Show waiting rooms")
+    print("  /join <room_id>    - Join a room")
+    print("  quit               - Exit\n")
+
+
+# Dispatch table keyed on the lowercased first token - one lookup instead
+# of chained .lower() comparisons over the whole message
+ADMIN_COMMANDS = {
+    '/list': cmd_list,
+    '/refresh': cmd_list,
+    '/join': cmd_join,
+    '/help': cmd_help,
+}
+
+
+async def send_messages():
     """Handle user input and send messages"""
     global username
 
-    while connected:
+    while sio.connected:
         try:
-            message = input(f"{username}: ")
+            message = await aioconsole.ainput(PROMPT)
+
+            # Lowercase only the first token, once
+            cmd, _, rest = message.partition(' ')
+            cmd = cmd.lower()
 
             # Handle quit command
-            if message.lower() == 'quit':
+            if cmd == 'quit':
                 print_message("\nDisconnecting...", 'yellow')
-                sio.disconnect()
+                await sio.disconnect()
                 break
 
             # Admin commands
             if is_admin:
-                if message.lower() == '/list' or message.lower() == '/refresh':
-                    sio.emit('list_rooms')
-                    continue
-
-                if message.lower().startswith('/join '):
-                    room_id = message.split(' ', 1)[1].strip()
-                    if room_id:
-                        sio.emit('join_room_by_id', {'room_id': room_id})
-                    else:
-                        print_message("Usage: /join <room_id>", 'red')
-                    continue
-                
-                if message.lower() == '/help':
-                    print("\nAvailable Commands:")
-                    print("  /list or /refresh  - Show waiting rooms")
-                    print("  /join <room_id>    - Join a room")
-                    print("  quit               - Exit\n")
+                handler = ADMIN_COMMANDS.get(cmd)
+                if handler:
+                    await handler(rest)
                     continue
 
             # Validate message
@@ -326,29 +435,28 @@ def send_messages():
                 continue
 
             # Stop typing indicator
-            stop_typing()
+            await stop_typing()
 
             # Clear the input line and show sent message
             sys.stdout.write('\033[F')  # Move cursor up
             clear_line()
 
-            timestamp = datetime.now().strftime('%H:%M:%S')
+            # time.strftime skips the datetime object construction
+            timestamp = time.strftime('%H:%M:%S')
             print_message(f"[{timestamp}] {username}: {message}", 'blue')
 
             # Send message to server
-            sio.emit('send_message', {'message': message})
-            
+            await queue_emit('send_message', {'message': message})
+
             # Trigger typing indicator for next input
             if message.strip():
-                handle_typing()
+                await handle_typing()
 
-        except KeyboardInterrupt:
-            print_message("\n\nDisconnecting...", 'yellow')
-            sio.disconnect()
+        except asyncio.CancelledError:
             break
         except EOFError:
             print_message("\n\nInput stream closed. Disconnecting...", 'yellow')
-            sio.disconnect()
+            await sio.disconnect()
             break
         except Exception as e:
             print_message(f"\nError: {e}", 'red')
@@ -358,9 +466,9 @@ def send_messages():
 # MAIN FUNCTION
 # ============================================
 
-def main():
+async def main():
     """Main client function"""
-    global username, is_admin
+    global username, is_admin, PROMPT
 
     print("=" * 60)
     print_message("WebSocket Chat Client - Enhanced Version", 'cyan')
@@ -397,10 +505,10 @@ def main():
             # Regular user
             is_admin = False
             username = input("\nEnter your name: ").strip()
-            
+
             if not username:
                 username = "Anonymous"
-            
+
             if len(username) > 50:
                 print_message("Name too long (max 50 characters)", 'red')
                 continue
@@ -416,22 +524,29 @@ def main():
         else:
             print_message("Invalid choice. Please enter 1 or 2.", 'red')
 
+    # Username is fixed from here on - build the prompt once
+    PROMPT = f"{username}: "
+
     # Connect to server
+    send_task = None
+    writer_task = None
+    watcher_task = None
     try:
         print_message(f"\nConnecting as {'Admin' if is_admin else 'User'}...", 'yellow')
-        
+
         # Connect with timeout
-        sio.connect(server_url, wait_timeout=10)
+        await sio.connect(server_url, wait_timeout=10, transports=['websocket'])
 
         # Join the chat
-        sio.emit('join_chat', {'username': username, 'password': password})
+        await sio.emit('join_chat', {'username': username, 'password': password})
 
-        # Start message sending thread
-        message_thread = threading.Thread(target=send_messages, daemon=True)
-        message_thread.start()
+        # Start the writer and input loops on the same event loop as the client
+        writer_task = asyncio.create_task(outbox_writer())
+        watcher_task = asyncio.create_task(typing_watcher())
+        send_task = asyncio.create_task(send_messages())
 
-        # Keep the client running
-        message_thread.join()
+        # Keep the client running until disconnected
+        await sio.wait()
 
     except socketio.exceptions.ConnectionError as e:
         print_message(f"\n✗ Connection failed: {e}", 'red')
@@ -441,22 +556,32 @@ def main():
         print("  3. Network connectivity issues")
         print("  4. Firewall blocking the connection")
         sys.exit(1)
-    except KeyboardInterrupt:
-        print_message("\n\nExiting...", 'yellow')
-        if sio.connected:
-            sio.disconnect()
-        sys.exit(0)
     except Exception as e:
         print_message(f"\n✗ Unexpected error: {e}", 'red')
         if sio.connected:
-            sio.disconnect()
+            await sio.disconnect()
         sys.exit(1)
     finally:
         # Cleanup
-        if typing_timer:
-            typing_timer.cancel()
+        if send_task:
+            send_task.cancel()
+        if writer_task:
+            writer_task.cancel()
+        if watcher_task:
+            watcher_task.cancel()
         print_message("\nGoodbye! 👋", 'green')
 
 
 if __name__ == '__main__':
-    main()
+    # uvloop is a drop-in, faster event loop (not available on Windows)
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print_message("\n\nExiting...", 'yellow')
+        sys.exit(0)
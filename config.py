@@ -22,6 +22,14 @@ class Config:
     # Flask secret key for sessions
     SECRET_KEY = os.getenv('SECRET_KEY', os.urandom(24).hex())
 
+    # Bcrypt cost for new password hashes - each extra round doubles
+    # both the login latency and an attacker's cracking cost
+    BCRYPT_LOG_ROUNDS = int(os.getenv('BCRYPT_LOG_ROUNDS', 12))
+
+    # Optional Redis URL - when set, Socket.IO uses it as a message
+    # queue so emits reach clients on other workers
+    REDIS_URL = os.getenv('REDIS_URL')
+
     # NEW: Telegram Configuration
     TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
     TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
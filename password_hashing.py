@@ -1,5 +1,17 @@
-from flask_bcrypt import Bcrypt
-
-bcrypt = Bcrypt()
-password_hash = bcrypt.generate_password_hash('YOUR_PASSWORD').decode('utf-8')
-print(password_hash)
+import time
+
+from flask_bcrypt import Bcrypt
+
+from config import Config
+
+bcrypt = Bcrypt()
+
+# Time a hash at the configured cost so the operator can tune
+# BCRYPT_LOG_ROUNDS - aim for ~100ms: slow enough to resist offline
+# cracking, fast enough that admin login stays responsive
+start = time.perf_counter()
+password_hash = bcrypt.generate_password_hash(
+    'YOUR_PASSWORD', rounds=Config.BCRYPT_LOG_ROUNDS).decode('utf-8')
+elapsed_ms = (time.perf_counter() - start) * 1000
+print(f"rounds={Config.BCRYPT_LOG_ROUNDS} took {elapsed_ms:.0f}ms")
+print(password_hash)
@@ -4,22 +4,55 @@ WebSocket Chat Server - Enhanced with Security & Features
 # MUST be first - before any other imports
 import eventlet
 eventlet.monkey_patch()
+from eventlet import tpool
 
 from flask import Flask, request, render_template
 from flask_socketio import SocketIO, emit, join_room, leave_room
 from datetime import datetime
-import uuid
+import secrets
 from config import Config
 from flask_bcrypt import Bcrypt
 import os
-import html
 from collections import defaultdict
+from itertools import islice
+import heapq
+import hmac
+import logging
+import logging.handlers
 import time
 import requests  # For Telegram API
-import threading  # For async notifications
+import queue
+
+# Use orjson for frame encode/decode when available - it is several times
+# faster than stdlib json on the small payloads chat traffic is made of
+try:
+    import orjson
+
+    class _OrjsonShim:
+        """Expose orjson through the json-module interface Socket.IO expects"""
+        dumps = staticmethod(lambda obj, **kwargs: orjson.dumps(obj).decode())
+        loads = staticmethod(orjson.loads)
+
+    _json_module = _OrjsonShim
+except ImportError:
+    import json as _json_module
+
+# Handlers only enqueue log records; a single listener task does the
+# actual stream writes, so logging never blocks the eventlet loop the
+# way bare print() calls do
+_log_queue = queue.Queue(-1)
+log = logging.getLogger('chat')
+log.setLevel(logging.INFO)
+log.addHandler(logging.handlers.QueueHandler(_log_queue))
+_log_listener = logging.handlers.QueueListener(
+    _log_queue, logging.StreamHandler())
+_log_listener.start()
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = Config.SECRET_KEY
+# Bcrypt(app) reads this at init time - set it explicitly so the
+# configured cost governs every hash this process generates
+app.config['BCRYPT_LOG_ROUNDS'] = Config.BCRYPT_LOG_ROUNDS
 app.config.from_object(Config)
 
 # CORS configuration for Render.com deployment
@@ -28,104 +61,248 @@ ALLOWED_ORIGINS = [
     "http://localhost:5000",
 ]
 
+# async_mode is pinned so Flask-SocketIO skips server-type autodetection
+# at startup; the whole deployment (monkey_patch above, gunicorn eventlet
+# worker in the Procfile) is built around eventlet
 socketio = SocketIO(
-    app, 
+    app,
     cors_allowed_origins=ALLOWED_ORIGINS,
+    async_mode='eventlet',
     ping_timeout=60,
-    ping_interval=25
+    ping_interval=25,
+    json=_json_module,
+    # WebSocket only - no long-polling fallback, so connections skip
+    # the polling handshake and never need sticky sessions behind a
+    # load balancer
+    transports=['websocket'],
+    # With REDIS_URL set, emits are published through Redis and reach
+    # clients connected to other workers. Room bookkeeping itself is
+    # still per-process, so scaling past one worker also needs the
+    # waiting/active dicts moved to shared storage.
+    message_queue=Config.REDIS_URL
 )
 bcrypt = Bcrypt(app)
 
-# Store room information
+# room_id -> WaitingRoom / ActiveRoom; slotted records instead of
+# per-room dicts - attribute offsets beat hash probes and the fixed
+# layout costs a fraction of a dict per room
 waiting_rooms = {}
 active_rooms = {}
-active_users = {}
-session_rooms = {}
-typing_status = {}
 
-# Rate limiting storage
-rate_limit_storage = defaultdict(lambda: {'count': 0, 'reset_time': time.time()})
+# sid -> Session; one slotted object per connection replaces the old
+# parallel active_users / session_rooms / rate-limit dicts, so handlers
+# do a single lookup and disconnect cleanup is one pop
+sessions = {}
+
+# room_id -> set of sids currently typing; set membership avoids
+# building a "room:sid" key string on every keystroke
+typing_status = defaultdict(set)
+
+# Min-heap of (expiry_monotonic, room_id) so cleanup only pops expired
+# heads instead of ISO-parsing every waiting room; rooms claimed before
+# expiry just leave a stale entry that gets skipped lazily
+ROOM_MAX_AGE_SECONDS = 2 * 60 * 60
+room_expiry_heap = []
+
+# Sessions that already passed the bcrypt admin check - a repeated
+# join_chat on the same connection must not re-run the KDF
+admin_sids = set()
+
+# Cached rooms_list payload, dropped whenever waiting_rooms mutates, so
+# repeated admin refreshes between changes reuse one prebuilt dict
+# instead of re-walking every room (single-element list, like _ts_cache,
+# to spare handlers a global statement)
+_rooms_cache = [None]
 
 ADMIN_USERNAME = Config.ADMIN_USERNAME
+ADMIN_USERNAME_B = ADMIN_USERNAME.encode()
 ADMIN_PASSWORD_HASH = Config.ADMIN_PASSWORD_HASH
 
+# Hash of throwaway random bytes, used to equalize login timing when a
+# non-admin username arrives with a password. A verify's cost follows
+# the cost embedded in the hash, so this must be minted at the same
+# rounds as ADMIN_PASSWORD_HASH or the timing difference comes back
+_DUMMY_HASH = bcrypt.generate_password_hash(
+    secrets.token_hex(16), rounds=Config.BCRYPT_LOG_ROUNDS).decode()
+
+# Short-lived HMAC-signed tokens let an authenticated admin reconnect
+# without paying for bcrypt again; verification is a microsecond HMAC
+# instead of the deliberately slow KDF
+_AUTH_TOKEN_TTL = 15 * 60
+_AUTH_TOKEN_KEY = Config.SECRET_KEY.encode()
+
+
+def issue_admin_token():
+    """Mint a signed token valid for _AUTH_TOKEN_TTL seconds"""
+    expiry = str(int(time.time()) + _AUTH_TOKEN_TTL)
+    sig = hmac.new(_AUTH_TOKEN_KEY, expiry.encode(), 'sha256').hexdigest()
+    return f"{expiry}.{sig}"
+
+
+def verify_admin_token(token):
+    """Check a token's signature and expiry in constant time"""
+    if not isinstance(token, str):
+        return False
+    expiry, _, sig = token.partition('.')
+    if not sig or not expiry.isdigit() or int(expiry) < time.time():
+        return False
+    expected = hmac.new(_AUTH_TOKEN_KEY, expiry.encode(), 'sha256').hexdigest()
+    return hmac.compare_digest(sig, expected)
+
+
 # Rate limiting constants
 MESSAGE_RATE_LIMIT = 10
 RATE_LIMIT_WINDOW = 60
+# Token-bucket refill rate: the full allowance spread over the window
+RATE_LIMIT_REFILL = MESSAGE_RATE_LIMIT / RATE_LIMIT_WINDOW
+
+
+class WaitingRoom:
+    """A room created by a user, waiting for the admin to claim it"""
+    __slots__ = ('username', 'session_id', 'created_at_ts',
+                 'created_at_iso', 'created_at_monotonic', 'room_id')
+
+    def __init__(self, username, session_id, room_id):
+        self.username = username
+        self.session_id = session_id
+        self.room_id = room_id
+        self.created_at_ts = time.time()
+        self.created_at_iso = None
+        self.created_at_monotonic = time.monotonic()
+
+
+class ActiveRoom:
+    """A claimed room with both the user and the admin in it"""
+    __slots__ = ('admin_sid', 'user_sid', 'username')
+
+    def __init__(self, admin_sid, user_sid, username):
+        self.admin_sid = admin_sid
+        self.user_sid = user_sid
+        self.username = username
+
+
+class Session:
+    """Per-connection state, including the token bucket"""
+    __slots__ = ('username', 'room_id', 'waiting_room_id',
+                 'tokens', 'last_refill', 'is_admin')
+
+    def __init__(self, username, is_admin=False):
+        self.username = username
+        self.room_id = None
+        self.waiting_room_id = None
+        self.tokens = float(MESSAGE_RATE_LIMIT)
+        self.last_refill = time.monotonic()
+        self.is_admin = is_admin
 
 
 # ============================================
 # NEW: TELEGRAM NOTIFICATION MODULE
 # ============================================
 
-def send_telegram_notification(message_text, parse_mode='Markdown'):
-    """
-    Send notification to admin via Telegram bot
-    Runs asynchronously to not block the main thread
-    """
-    if not Config.TELEGRAM_NOTIFICATIONS_ENABLED:
-        return
-    
-    def send_async():
+# Telegram settings never change after startup - bind them once instead
+# of walking the Config attribute chain / rebuilding the URL per call
+_TG_ENABLED = Config.TELEGRAM_NOTIFICATIONS_ENABLED
+_TG_URL = f"https://api.telegram.org/bot{Config.TELEGRAM_BOT_TOKEN}/sendMessage"
+_TG_CHAT_ID = Config.TELEGRAM_CHAT_ID
+
+# One keep-alive session shared by all notifications, so each send reuses
+# the TLS connection to api.telegram.org instead of handshaking fresh
+_telegram_session = requests.Session()
+
+# Bounded queue drained by a single long-lived worker; avoids spawning a
+# thread per notification, which can pile up on bursts
+_telegram_queue = queue.Queue(maxsize=100)
+_telegram_worker_task = None
+
+
+def _telegram_worker():
+    """Drain the notification queue and post to the Telegram API"""
+    while True:
+        message_text, parse_mode = _telegram_queue.get()
         try:
-            url = f"https://api.telegram.org/bot{Config.TELEGRAM_BOT_TOKEN}/sendMessage"
             payload = {
-                'chat_id': Config.TELEGRAM_CHAT_ID,
+                'chat_id': _TG_CHAT_ID,
                 'text': message_text,
                 'parse_mode': parse_mode,
                 'disable_web_page_preview': True
             }
-            
-            response = requests.post(url, json=payload, timeout=5)
-            
+
+            response = _telegram_session.post(_TG_URL, json=payload, timeout=5)
+
             if response.status_code == 200:
-                print(f"[TELEGRAM] Notification sent successfully")
+                log.info("[TELEGRAM] Notification sent successfully")
             else:
-                print(f"[TELEGRAM] Failed to send: {response.status_code} - {response.text}")
-                
+                log.warning("[TELEGRAM] Failed to send: %s - %s", response.status_code, response.text)
+
         except Exception as e:
-            print(f"[TELEGRAM] Error sending notification: {e}")
-    
-    # Run in separate thread to not block
-    thread = threading.Thread(target=send_async, daemon=True)
-    thread.start()
+            log.warning("[TELEGRAM] Error sending notification: %s", e)
 
 
-def format_telegram_new_user(username, room_id):
-    """Format notification for new user joining"""
-    current_time = datetime.now().strftime('%I:%M %p')
-    dashboard_url = Config.ADMIN_SERVER_URL or "http://localhost:5000"
-    
-    message = f"""🔔 *New Chat Request*
+def send_telegram_notification(message_text, parse_mode='Markdown'):
+    """
+    Queue a notification to admin via Telegram bot
+    Delivered by a background worker to not block the caller
+    """
+    if not _TG_ENABLED:
+        return
+
+    # start_background_task yields to the eventlet hub, so queueing a
+    # notification never stalls the calling handler
+    global _telegram_worker_task
+    if _telegram_worker_task is None:
+        _telegram_worker_task = socketio.start_background_task(_telegram_worker)
+
+    try:
+        _telegram_queue.put_nowait((message_text, parse_mode))
+    except queue.Full:
+        log.warning("[TELEGRAM] Notification queue full, dropping message")
+
+
+# Dashboard URL and message templates are constant - resolve them once
+# instead of per notification
+_DASHBOARD_URL = Config.ADMIN_SERVER_URL or "http://localhost:5000"
+
+_TG_NEW_USER_TEMPLATE = """🔔 *New Chat Request*
 
 👤 *User:* {username}
 🆔 *Room:* `{room_id}`
-⏰ *Time:* {current_time}
+⏰ *Time:* {time}
 
-[🔗 Open Dashboard]({dashboard_url})"""
-    
-    return message
+[🔗 Open Dashboard]({dashboard})"""
 
-
-def format_telegram_user_waiting(username, room_id, wait_minutes):
-    """Format notification for user waiting too long"""
-    dashboard_url = Config.ADMIN_SERVER_URL or "http://localhost:5000"
-    
-    message = f"""⚠️ *User Waiting {wait_minutes}+ Minutes!*
+_TG_USER_WAITING_TEMPLATE = """⚠️ *User Waiting {wait_minutes}+ Minutes!*
 
 👤 *User:* {username}
 🆔 *Room:* `{room_id}`
 ⏰ *Waiting:* {wait_minutes} minutes
 
 🔥 *High Priority*
-[🔗 Open Dashboard Now]({dashboard_url})"""
-    
-    return message
+[🔗 Open Dashboard Now]({dashboard})"""
+
+
+def format_telegram_new_user(username, room_id):
+    """Format notification for new user joining"""
+    current_time = datetime.now().strftime('%I:%M %p')
+    return _TG_NEW_USER_TEMPLATE.format(
+        username=username,
+        room_id=room_id,
+        time=current_time,
+        dashboard=_DASHBOARD_URL
+    )
+
+
+def format_telegram_user_waiting(username, room_id, wait_minutes):
+    """Format notification for user waiting too long"""
+    return _TG_USER_WAITING_TEMPLATE.format(
+        username=username,
+        room_id=room_id,
+        wait_minutes=wait_minutes,
+        dashboard=_DASHBOARD_URL
+    )
 
 
 def format_telegram_queue_status():
     """Format notification with current queue status"""
-    dashboard_url = Config.ADMIN_SERVER_URL or "http://localhost:5000"
     waiting_count = len(waiting_rooms)
     
     if waiting_count == 0:
@@ -137,18 +314,19 @@ def format_telegram_queue_status():
 
 """
     
-    # List up to 5 users
-    room_list = list(waiting_rooms.items())[:5]
-    for room_id, info in room_list:
-        username = info['username']
-        created = datetime.fromisoformat(info['created_at'])
-        wait_time = (datetime.now() - created).total_seconds() / 60
+    # List up to 5 users - islice avoids materializing the full item
+    # list, and the monotonic creation time makes wait time a single
+    # float subtract instead of an ISO parse
+    now = time.monotonic()
+    for room_id, info in islice(waiting_rooms.items(), 5):
+        username = info.username
+        wait_time = (now - info.created_at_monotonic) / 60
         message += f"• {username} ({int(wait_time)}m)\n"
     
     if waiting_count > 5:
         message += f"• +{waiting_count - 5} more...\n"
     
-    message += f"\n[🔗 Open Dashboard]({dashboard_url})"
+    message += f"\n[🔗 Open Dashboard]({_DASHBOARD_URL})"
     
     return message
 
@@ -157,43 +335,113 @@ def format_telegram_queue_status():
 # EXISTING FUNCTIONS (with Telegram additions)
 # ============================================
 
-def rate_limit_check(session_id, limit=MESSAGE_RATE_LIMIT, window=RATE_LIMIT_WINDOW):
-    """Check if user has exceeded rate limit"""
-    current_time = time.time()
-    user_data = rate_limit_storage[session_id]
-    
-    if current_time - user_data['reset_time'] > window:
-        user_data['count'] = 0
-        user_data['reset_time'] = current_time
-    
-    if user_data['count'] >= limit:
+def rate_limit_check(session, capacity=MESSAGE_RATE_LIMIT, rate=RATE_LIMIT_REFILL):
+    """Token-bucket rate limit check against a Session
+
+    Tokens refill continuously at `rate` per second up to `capacity`, so
+    allowance is smooth instead of resetting at window boundaries. The
+    bucket lives on the session itself, so its lifetime matches the
+    connection and no separate table needs capping or eviction.
+    """
+    # monotonic() can't jump backwards/forwards with NTP adjustments,
+    # which would otherwise drain or overfill buckets spuriously
+    current_time = time.monotonic()
+    tokens = min(capacity, session.tokens + (current_time - session.last_refill) * rate)
+    session.last_refill = current_time
+
+    if tokens < 1:
+        session.tokens = tokens
         return False
-    
-    user_data['count'] += 1
+
+    session.tokens = tokens - 1
     return True
 
 
+# html.escape does 4-5 sequential str.replace passes; str.translate with
+# a prebuilt table escapes everything in a single C-level pass
+_ESCAPE_TABLE = str.maketrans({
+    '&': '&amp;',
+    '<': '&lt;',
+    '>': '&gt;',
+    '"': '&quot;',
+    "'": '&#x27;',
+})
+
+
 def sanitize_input(text, max_length=1000):
     """Sanitize and validate user input"""
     if not text or not isinstance(text, str):
         return None
-    
+
     text = text.strip()[:max_length]
-    text = html.escape(text)
-    
-    return text if text else None
+    if not text:
+        return None
+
+    # Typical chat messages contain none of the escaped characters, so
+    # skip the translate pass (and its new string) when a quick scan
+    # finds nothing to replace
+    if not any(c in text for c in '&<>"\''):
+        return text
+
+    return text.translate(_ESCAPE_TABLE)
+
+
+# datetime.now().isoformat() allocates a datetime plus a ~26-char string
+# per call; chat timestamps don't need sub-100ms grain, so cache the
+# string per 100ms tick
+_ts_cache = [0, '']
+
+
+def now_iso():
+    """Current time as an ISO string, cached at 100ms resolution"""
+    tick = int(time.monotonic() * 10)
+    if _ts_cache[0] != tick:
+        _ts_cache[0] = tick
+        _ts_cache[1] = datetime.now().isoformat()
+    return _ts_cache[1]
+
+
+def room_created_iso(info):
+    """ISO creation time for a waiting room, formatted on first use
+
+    Creation only stores the wall-clock float; the string is built the
+    first time an admin payload needs it, so rooms no admin ever sees
+    never pay for the formatting.
+    """
+    iso = info.created_at_iso
+    if iso is None:
+        iso = info.created_at_iso = datetime.fromtimestamp(
+            info.created_at_ts).isoformat()
+    return iso
 
 
 def cleanup_old_rooms():
-    """Remove rooms older than 2 hours"""
-    from datetime import timedelta
-    now = datetime.now()
-    
-    for room_id in list(waiting_rooms.keys()):
-        created = datetime.fromisoformat(waiting_rooms[room_id]['created_at'])
-        if now - created > timedelta(hours=2):
-            print(f"[CLEANUP] Removing stale room: {room_id}")
-            del waiting_rooms[room_id]
+    """Remove waiting rooms older than 2 hours"""
+    now = time.monotonic()
+
+    while room_expiry_heap and room_expiry_heap[0][0] <= now:
+        _, room_id = heapq.heappop(room_expiry_heap)
+        info = waiting_rooms.pop(room_id, None)
+        if info is None:
+            # Room was claimed by an admin or already removed
+            continue
+        _rooms_cache[0] = None
+        log.info("[CLEANUP] Removing stale room: %s", room_id)
+        session = sessions.get(info.session_id)
+        if session:
+            session.waiting_room_id = None
+
+
+def _cleanup_loop():
+    """Expire stale waiting rooms every 5 minutes"""
+    while True:
+        socketio.sleep(300)
+        cleanup_old_rooms()
+
+
+# Started lazily on the first connection so it works both under
+# socketio.run() and under gunicorn
+_cleanup_task_started = False
 
 
 @app.route('/')
@@ -205,7 +453,12 @@ def index():
 @socketio.on('connect')
 def handle_connect():
     """Handle new client connections"""
-    print(f"\n[SERVER] New connection from {request.sid}")
+    global _cleanup_task_started
+    if not _cleanup_task_started:
+        _cleanup_task_started = True
+        socketio.start_background_task(_cleanup_loop)
+
+    log.info("[SERVER] New connection from %s", request.sid)
     emit('connection_response', {'status': 'connected', 'sid': request.sid})
 
 
@@ -220,37 +473,86 @@ def handle_join(data):
         emit('auth_failed', {'message': 'Invalid username'})
         return
 
-    # Admin authentication
-    if username == ADMIN_USERNAME:
-        if not password or not bcrypt.check_password_hash(ADMIN_PASSWORD_HASH, password):
-            emit('auth_failed', {'message': 'Invalid credentials. Access denied.'})
-            print(f"[SERVER] Failed admin login from {session_id}")
-            return
+    # Admin authentication - compare_digest scans the full name, so
+    # response timing doesn't reveal how much of it matched
+    if hmac.compare_digest(username.encode(), ADMIN_USERNAME_B):
+        # bcrypt is deliberately expensive (~100ms) - only run it once
+        # per connection, not on every re-emitted join_chat
+        if session_id not in admin_sids:
+            # A valid reconnect token skips bcrypt; otherwise run the
+            # check in a native thread via tpool so the ~100ms key
+            # schedule doesn't stall every other greenlet on the hub
+            if not verify_admin_token(data.get('token')):
+                if not password or not tpool.execute(
+                        bcrypt.check_password_hash, ADMIN_PASSWORD_HASH, password):
+                    emit('auth_failed', {'message': 'Invalid credentials. Access denied.'})
+                    log.info("[SERVER] Failed admin login from %s", session_id)
+                    return
+
+                # The tpool hop yields to the hub, so the client may
+                # have disconnected while bcrypt ran - in that case the
+                # disconnect handler has already fired and anything
+                # registered here would leak (and join_room would raise)
+                if not socketio.server.manager.is_connected(session_id, '/'):
+                    log.info("[SERVER] %s disconnected during admin auth", session_id)
+                    return
+
+            admin_sids.add(session_id)
+
+        sessions[session_id] = Session(username, is_admin=True)
+        # Admins share one Socket.IO room so new-room notifications are
+        # a single emit instead of one per admin sid
+        join_room('admins')
+        log.info("[SERVER] Admin authenticated (Session: %s)", session_id)
 
-        active_users[session_id] = username
-        print(f"[SERVER] Admin authenticated (Session: {session_id})")
-        
-        cleanup_old_rooms()
-        
         emit('admin_connected', {
-            'message': 'Connected as Admin'
+            'message': 'Connected as Admin',
+            'token': issue_admin_token()
         })
     else:
-        # Regular user creates a new room
-        active_users[session_id] = username
-        room_id = str(uuid.uuid4())[:8]
-
-        waiting_rooms[room_id] = {
-            'username': username,
-            'session_id': session_id,
-            'created_at': datetime.now().isoformat(),
-            'room_id': room_id
-        }
+        # Burn a bcrypt check on a dummy hash so probing with passwords
+        # can't distinguish admin from non-admin usernames by latency
+        if password:
+            tpool.execute(
+                bcrypt.check_password_hash, _DUMMY_HASH, password)
+            # Same yield window as the admin path: bail out before
+            # creating any state for a sid that is already gone
+            if not socketio.server.manager.is_connected(session_id, '/'):
+                log.info("[SERVER] %s disconnected during join", session_id)
+                return
+
+        # A repeated join_chat on the same connection replaces its
+        # waiting room - the session index only tracks the newest, so
+        # without this each extra join orphaned a room until the 2h
+        # expiry
+        old_session = sessions.get(session_id)
+        if old_session and old_session.waiting_room_id:
+            if waiting_rooms.pop(old_session.waiting_room_id, None) is not None:
+                _rooms_cache[0] = None
+                leave_room(old_session.waiting_room_id)
+                log.info("[SERVER] Replaced waiting room: %s",
+                         old_session.waiting_room_id)
 
-        session_rooms[session_id] = room_id
+        # Regular user creates a new room
+        session = Session(username)
+        sessions[session_id] = session
+        # 8 url-safe chars carrying 48 bits of entropy straight from
+        # the kernel RNG; re-draw on the vanishingly rare collision
+        room_id = secrets.token_urlsafe(6)
+        while room_id in waiting_rooms or room_id in active_rooms:
+            room_id = secrets.token_urlsafe(6)
+
+        room = WaitingRoom(username, session_id, room_id)
+        waiting_rooms[room_id] = room
+        _rooms_cache[0] = None
+        heapq.heappush(room_expiry_heap,
+                       (room.created_at_monotonic + ROOM_MAX_AGE_SECONDS, room_id))
+
+        session.room_id = room_id
+        session.waiting_room_id = room_id
         join_room(room_id)
 
-        print(f"[SERVER] {username} created room: {room_id}")
+        log.info("[SERVER] %s created room: %s", username, room_id)
 
         emit('waiting_for_admin', {
             'room_id': room_id,
@@ -260,16 +562,17 @@ def handle_join(data):
         # NEW: Send Telegram notification
         notification_message = format_telegram_new_user(username, room_id)
         send_telegram_notification(notification_message)
-        print(f"[TELEGRAM] Notification sent for user: {username}")
+        log.info("[TELEGRAM] Notification queued for user: %s", username)
 
-        # Notify all connected admins
-        for sid, uname in active_users.items():
-            if uname == ADMIN_USERNAME:
-                emit('new_room_available', {
-                    'room_id': room_id,
-                    'username': username,
-                    'created_at': waiting_rooms[room_id]['created_at']
-                }, room=sid)
+        # Notify connected admins - always emitted, not gated on the
+        # local admin_sids, because with a Redis message queue the admin
+        # may be on another worker; an empty local room costs one
+        # publish at most
+        socketio.server.emit('new_room_available', {
+            'room_id': room_id,
+            'username': username,
+            'created_at': room_created_iso(room)
+        }, room='admins', namespace='/')
 
 
 # ... REST OF YOUR EXISTING server.py CODE STAYS THE SAME ...
@@ -279,52 +582,58 @@ def handle_join(data):
 def handle_list_rooms():
     """Admin requests list of waiting rooms"""
     session_id = request.sid
-    username = active_users.get(session_id)
+    session = sessions.get(session_id)
 
-    if username != ADMIN_USERNAME:
+    # is_admin was fixed at auth time - a bool check instead of a string
+    # compare against ADMIN_USERNAME
+    if not session or not session.is_admin:
         emit('system_message', {'message': 'Only Admin can list rooms'})
         return
 
-    rooms_list = []
-    for room_id, info in waiting_rooms.items():
-        rooms_list.append({
-            'room_id': room_id,
-            'username': info['username'],
-            'created_at': info['created_at']
-        })
+    payload = _rooms_cache[0]
+    if payload is None:
+        rooms_list = []
+        for room_id, info in waiting_rooms.items():
+            rooms_list.append({
+                'room_id': room_id,
+                'username': info.username,
+                'created_at': room_created_iso(info)
+            })
+        payload = _rooms_cache[0] = {'rooms': rooms_list}
 
-    emit('rooms_list', {'rooms': rooms_list})
+    emit('rooms_list', payload)
 
 
 @socketio.on('join_room_by_id')
 def handle_admin_join_room(data):
     """Admin joins a specific room by room_id"""
     session_id = request.sid
-    username = active_users.get(session_id)
+    session = sessions.get(session_id)
     room_id = data.get('room_id')
 
-    if username != ADMIN_USERNAME:
+    if not session or not session.is_admin:
         emit('system_message', {'message': 'Only Admin can join rooms'})
         return
 
-    if room_id not in waiting_rooms:
+    # Single pop instead of a membership probe followed by a pop
+    room_info = waiting_rooms.pop(room_id, None)
+    if room_info is None:
         emit('system_message', {'message': f'Room {room_id} not found'})
         return
+    _rooms_cache[0] = None
 
-    room_info = waiting_rooms.pop(room_id)
-    user_sid = room_info['session_id']
-    user_name = room_info['username']
+    user_sid = room_info.session_id
+    user_name = room_info.username
+    user_session = sessions.get(user_sid)
+    if user_session:
+        user_session.waiting_room_id = None
 
-    active_rooms[room_id] = {
-        'admin_sid': session_id,
-        'user_sid': user_sid,
-        'username': user_name
-    }
+    active_rooms[room_id] = ActiveRoom(session_id, user_sid, user_name)
 
-    session_rooms[session_id] = room_id
+    session.room_id = room_id
     join_room(room_id)
 
-    print(f"[SERVER] Admin joined room: {room_id} with {user_name}")
+    log.info("[SERVER] Admin joined room: %s with %s", room_id, user_name)
 
     emit('joined_room', {
         'room_id': room_id,
@@ -341,16 +650,30 @@ def handle_admin_join_room(data):
 def handle_message(data):
     """Handle incoming messages with rate limiting and validation"""
     session_id = request.sid
-    username = active_users.get(session_id, 'Anonymous')
-    message_text = sanitize_input(data.get('message', ''))
-    room_id = session_rooms.get(session_id)
+    session = sessions.get(session_id)
 
-    if not rate_limit_check(session_id):
+    if session is None:
+        emit('system_message', {'message': 'You are not in any room yet'})
+        return
+
+    # Reject blank messages on the raw text - isspace() bails on the
+    # first real character, so non-empty messages don't pay for the
+    # strip allocation sanitize_input would otherwise do here
+    raw_message = data.get('message')
+    if not raw_message or not isinstance(raw_message, str) or raw_message.isspace():
+        emit('system_message', {'message': 'Message cannot be empty'})
+        return
+
+    if not rate_limit_check(session):
         emit('system_message', {
             'message': 'Rate limit exceeded. Please slow down.'
         })
         return
 
+    username = session.username
+    room_id = session.room_id
+    message_text = sanitize_input(raw_message)
+
     if not message_text:
         emit('system_message', {'message': 'Message cannot be empty'})
         return
@@ -359,87 +682,100 @@ def handle_message(data):
         emit('system_message', {'message': 'You are not in any room yet'})
         return
 
-    if room_id in waiting_rooms:
-        emit('system_message', {'message': 'Waiting for Admin to join...'})
-        return
-
+    # One probe on the common path: a deliverable message only needs
+    # the active check; the waiting lookup happens on the error branch
     if room_id not in active_rooms:
-        emit('system_message', {'message': 'Room is no longer active'})
+        if room_id in waiting_rooms:
+            emit('system_message', {'message': 'Waiting for Admin to join...'})
+        else:
+            emit('system_message', {'message': 'Room is no longer active'})
         return
 
     message_obj = {
         'username': username,
         'message': message_text,
-        'timestamp': datetime.now().isoformat(),
+        'timestamp': now_iso(),
         'room_id': room_id
     }
 
-    print(f"[Room:{room_id}] {username}: {message_text}")
+    # Skip the message formatting entirely unless debug logging is on
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("[Room:%s] %s: %s", room_id, username, message_text)
 
-    typing_key = f"{room_id}:{session_id}"
-    if typing_key in typing_status:
-        del typing_status[typing_key]
-        emit('user_stopped_typing', {'username': username}, room=room_id, include_self=False)
+    typists = typing_status.get(room_id)
+    if typists and session_id in typists:
+        typists.discard(session_id)
+        socketio.server.emit('user_stopped_typing', {'username': username},
+                             room=room_id, namespace='/', skip_sid=session_id)
 
-    emit('receive_message', message_obj, room=room_id, include_self=False)
+    # Broadcasts go straight to the Socket.IO server; the flask_socketio
+    # emit() wrapper re-resolves the request context and namespace on
+    # every call, which is pure overhead for a fixed-namespace fan-out
+    socketio.server.emit('receive_message', message_obj,
+                         room=room_id, namespace='/', skip_sid=session_id)
 
 
 @socketio.on('typing')
 def handle_typing(data):
     """Handle typing indicator"""
     session_id = request.sid
-    username = active_users.get(session_id, 'Anonymous')
-    room_id = session_rooms.get(session_id)
+    session = sessions.get(session_id)
     is_typing = data.get('typing', False)
 
-    if not room_id or room_id not in active_rooms:
+    if session is None:
         return
 
-    typing_key = f"{room_id}:{session_id}"
+    username = session.username
+    room_id = session.room_id
+
+    if not room_id or room_id not in active_rooms:
+        return
 
     if is_typing:
-        typing_status[typing_key] = True
-        emit('user_typing', {'username': username}, room=room_id, include_self=False)
+        typing_status[room_id].add(session_id)
+        socketio.server.emit('user_typing', {'username': username},
+                             room=room_id, namespace='/', skip_sid=session_id)
     else:
-        if typing_key in typing_status:
-            del typing_status[typing_key]
-        emit('user_stopped_typing', {'username': username}, room=room_id, include_self=False)
+        typists = typing_status.get(room_id)
+        if typists:
+            typists.discard(session_id)
+        socketio.server.emit('user_stopped_typing', {'username': username},
+                             room=room_id, namespace='/', skip_sid=session_id)
 
 
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle client disconnection"""
     session_id = request.sid
-    username = active_users.get(session_id, 'Unknown')
-    room_id = session_rooms.get(session_id)
+    session = sessions.pop(session_id, None)
+    username = session.username if session else 'Unknown'
+    room_id = session.room_id if session else None
 
     if room_id:
-        typing_key = f"{room_id}:{session_id}"
-        if typing_key in typing_status:
-            del typing_status[typing_key]
-
-    rooms_to_remove = [rid for rid, info in waiting_rooms.items() if info['session_id'] == session_id]
-    for rid in rooms_to_remove:
-        del waiting_rooms[rid]
-        print(f"[SERVER] Removed waiting room: {rid}")
-
-    if room_id and room_id in active_rooms:
-        emit('user_left', {
+        typists = typing_status.get(room_id)
+        if typists:
+            typists.discard(session_id)
+
+    waiting_rid = session.waiting_room_id if session else None
+    if waiting_rid:
+        waiting_rooms.pop(waiting_rid, None)
+        _rooms_cache[0] = None
+        log.info("[SERVER] Removed waiting room: %s", waiting_rid)
+
+    if room_id and active_rooms.pop(room_id, None) is not None:
+        socketio.server.emit('user_left', {
             'username': username,
             'message': f'{username} has left the chat'
-        }, room=room_id, include_self=False)
+        }, room=room_id, namespace='/', skip_sid=session_id)
 
-        del active_rooms[room_id]
-        print(f"[SERVER] Room {room_id} closed")
+        typing_status.pop(room_id, None)
+        log.info("[SERVER] Room %s closed", room_id)
 
-    if session_id in active_users:
-        del active_users[session_id]
-    if session_id in session_rooms:
-        del session_rooms[session_id]
-    if session_id in rate_limit_storage:
-        del rate_limit_storage[session_id]
+    if session and session.is_admin:
+        leave_room('admins')
+    admin_sids.discard(session_id)
 
-    print(f"[SERVER] {username} disconnected")
+    log.info("[SERVER] %s disconnected", username)
 
 
 if __name__ == '__main__':
@@ -11,6 +11,7 @@ const ChatApp = {
     isAdmin: false,
     username: '',
     availableRooms: {},
+    authToken: null,
     currentRoomId: '',
     typingTimeout: null,
     isTyping: false,
@@ -119,9 +120,10 @@ function connect() {
     try {
         // Create socket connection with automatic protocol detection
         // Socket.IO automatically uses wss:// on HTTPS and ws:// on HTTP
+        // WebSocket-only: skips the long-polling handshake round-trips
+        // and keeps the connection load-balancer friendly
         ChatApp.socket = io({
-            transports: ['websocket', 'polling'],
-            upgrade: true,
+            transports: ['websocket'],
             reconnection: true,
             reconnectionAttempts: 5,
             reconnectionDelay: 1000
@@ -188,6 +190,16 @@ function setupSocketListeners() {
 function handleConnect() {
     console.log('Connected to server');
     showStatus('Connected', 'connected');
+
+    // On a reconnect, re-authenticate with the short-lived token from
+    // admin_connected - the server verifies it with a cheap HMAC check
+    // instead of re-running bcrypt
+    if (ChatApp.authToken) {
+        ChatApp.socket.emit('join_chat', {
+            username: ChatApp.username,
+            token: ChatApp.authToken
+        });
+    }
 }
 
 function handleDisconnect() {
@@ -206,6 +218,7 @@ function handleAuthFailed(data) {
 }
 
 function handleAdminConnected(data) {
+    ChatApp.authToken = data.token || null;
     showStatus('Connected as Admin - Managing Chats', 'connected');
     
     document.getElementById('commands').classList.remove('hidden');